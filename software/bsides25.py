@@ -157,6 +157,7 @@ def _clamp(value, minimum, maximum):
 
 
 def get_led_state_for_homeassistant():
+    """Return (effect_index, brightness_255, hue, saturation, effect_name, speed)."""
     effect_index = led_effect.value if led_effect.value < len(led_effects) else 0
     effect_name = None
     effect_list = get_effect_names()
@@ -164,14 +165,12 @@ def get_led_state_for_homeassistant():
         effect_name = effect_list[effect_index]
 
     brightness_255 = int((led_brightness.value * 255) / max(1, led_brightness.maxval))
-    return {
-        "effect_index": effect_index,
-        "effect_name": effect_name,
-        "brightness": _clamp(brightness_255, 0, 255),
-        "hue": _clamp(led_hue.value, 0, led_hue.maxval),
-        "saturation": _clamp(led_sat.value, 0, led_sat.maxval),
-        "speed": _clamp(led_speed.value, 0, led_speed.maxval),
-    }
+    return (effect_index,
+            _clamp(brightness_255, 0, 255),
+            _clamp(led_hue.value, 0, led_hue.maxval),
+            _clamp(led_sat.value, 0, led_sat.maxval),
+            effect_name,
+            _clamp(led_speed.value, 0, led_speed.maxval))
 
 
 def apply_homeassistant_command(cmd):
@@ -244,15 +243,16 @@ USERNAME = load_username()
 
 ID_FILENAME = "id.txt"
 
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
 def is_valid_hex_id(s):
     """Check if s is a 12-character hex string (6 bytes)."""
     if len(s) != 12:
         return False
-    try:
-        int(s, 16)
-        return True
-    except ValueError:
-        return False
+    for c in s:
+        if c not in _HEX_DIGITS:
+            return False
+    return True
 
 def load_or_create_device_id():
     device_id = None
@@ -799,7 +799,7 @@ class FetchNameScreen(Screen):
         if not self.wlan.isconnected():
             self.wlan.connect(SSID, PASSWORD)
             for _ in range(20):  # wait up to ~10 seconds
-                await asyncio.sleep(0.5)
+                await asyncio.sleep_ms(500)
                 if self.wlan.isconnected():
                     return
             raise RuntimeError("Could not connect to WiFi")
@@ -814,7 +814,7 @@ class FetchNameScreen(Screen):
         for _ in range(20):  # up to ~10 seconds
             if not self.wlan.isconnected():
                 break
-            await asyncio.sleep(0.5)
+            await asyncio.sleep_ms(500)
         self.wlan.active(False)
 
     async def _fetch_name(self):
@@ -4,97 +4,117 @@ Handles loading of WiFi, HomeAssistant, and other settings from config.json.
 """
 
 import json
-import os
-
-# Default configuration values
-DEFAULT_CONFIG = {
-    "wifi": {
-        "ssid": "",
-        "password": "",
-        "url": "",
-        "url_qr": ""
-    },
-    "homeassistant": {
-        "enabled": False,
-        "broker": "",
-        "port": 1883,
-        "username": "",
-        "password": "",
-        "device_name": "BSides Badge",
-        "discovery_prefix": "homeassistant"
-    },
-    "badge": {
-        "auto_connect": False,
-        "scan_on_startup": False,
-        "debug": False
-    }
-}
+
+# Default configuration values. Kept as a JSON literal (stored in flash when
+# frozen) and parsed into a fresh tree per Config, so instances never share
+# nested dicts with each other or with the defaults.
+_DEFAULT_CONFIG_JSON = (
+    b'{"wifi":{"ssid":"","password":"","url":"","url_qr":""},'
+    b'"homeassistant":{"enabled":false,"broker":"","port":1883,'
+    b'"username":"","password":"","device_name":"BSides Badge",'
+    b'"discovery_prefix":"homeassistant"},'
+    b'"badge":{"auto_connect":false,"scan_on_startup":false,"debug":false}}'
+)
+
+def _serialize(config):
+    """Render config the way save() writes it to disk."""
+    try:
+        return json.dumps(config, indent=2)
+    except TypeError:
+        # MicroPython's json has no indent support
+        return json.dumps(config)
+
+# Text of an untouched default config.json, letting load() skip the merge
+_DEFAULT_TEXT = _serialize(json.loads(_DEFAULT_CONFIG_JSON))
+
+# Dot-path -> key tuple, so each distinct path is split only once
+_PATH_CACHE = {}
+
+def _split_path(path):
+    keys = _PATH_CACHE.get(path)
+    if keys is None:
+        keys = _PATH_CACHE[path] = tuple(path.split('.'))
+    return keys
 
 class Config:
     """Configuration manager for badge settings."""
 
     def __init__(self, config_file="config.json"):
         self.config_file = config_file
-        self.config = DEFAULT_CONFIG.copy()
+        self.config = json.loads(_DEFAULT_CONFIG_JSON)
         self.load()
 
     def load(self):
         """Load configuration from file, creating default if missing."""
         try:
             with open(self.config_file, "r") as f:
-                loaded_config = json.load(f)
+                raw = f.read()
+            # A file still matching the defaults needs no parse or merge
+            if raw != _DEFAULT_TEXT:
                 # Deep merge with defaults
-                self._merge_config(self.config, loaded_config)
-                print(f"Configuration loaded from {self.config_file}")
+                self._merge_config(self.config, json.loads(raw))
+            print(f"Configuration loaded from {self.config_file}")
         except OSError:
             print(f"Config file {self.config_file} not found, using defaults")
             self.save()  # Create default config file
         except ValueError as e:
             print(f"Invalid JSON in {self.config_file}: {e}")
             print("Using default configuration")
+        self._rebuild_flat()
 
     def save(self):
         """Save current configuration to file."""
         try:
             with open(self.config_file, "w") as f:
-                json.dump(self.config, f, indent=2)
+                f.write(_serialize(self.config))
                 print(f"Configuration saved to {self.config_file}")
         except OSError as e:
             print(f"Failed to save config: {e}")
 
     def _merge_config(self, base, update):
-        """Deep merge configuration dictionaries."""
-        for key, value in update.items():
-            if key in base and isinstance(base[key], dict) and isinstance(value, dict):
-                self._merge_config(base[key], value)
-            else:
-                base[key] = value
+        """Deep merge configuration dictionaries in place, without recursion."""
+        stack = [(base, update)]
+        while stack:
+            b, u = stack.pop()
+            for key, value in u.items():
+                bv = b.get(key)
+                if isinstance(bv, dict) and isinstance(value, dict):
+                    stack.append((bv, value))
+                else:
+                    b[key] = value
+
+    def _rebuild_flat(self):
+        """Index every node of the config tree by its dot-separated path."""
+        flat = {}
+        stack = [("", self.config)]
+        while stack:
+            prefix, node = stack.pop()
+            for key, value in node.items():
+                path = prefix + key
+                flat[path] = value
+                if isinstance(value, dict):
+                    stack.append((path + ".", value))
+        self._flat = flat
 
     def get(self, path, default=None):
         """Get configuration value by dot-separated path."""
-        keys = path.split('.')
-        value = self.config
-
-        try:
-            for key in keys:
-                value = value[key]
-            return value
-        except (KeyError, TypeError):
-            return default
+        return self._flat.get(path, default)
 
     def set(self, path, value):
         """Set configuration value by dot-separated path."""
-        keys = path.split('.')
+        keys = _split_path(path)
         config = self.config
 
-        # Navigate to parent
+        # Navigate to parent, replacing missing or scalar nodes with dicts
         for key in keys[:-1]:
-            if key not in config:
-                config[key] = {}
-            config = config[key]
+            node = config.get(key)
+            if not isinstance(node, dict):
+                node = config[key] = {}
+            config = node
 
         # Set final value
         config[keys[-1]] = value
+        self._rebuild_flat()
 
     # Convenience properties for common values
     @property
@@ -27,6 +27,7 @@ silently does nothing.
 """
 
 import json
+import time
 
 import uasyncio as asyncio
 
@@ -39,6 +40,26 @@ except ImportError:
     MQTTClient = None  # type: ignore
 
 
+# State and attribute payloads have a fixed shape, so they are rendered from
+# templates instead of going through json.dumps on every publish.
+_STATE_FMT = '{{"state":"{}","brightness":{},"hs_color":[{},{}],"effect":{}}}'
+_ATTR_FMT = '{{"speed":{},"effect_index":{}}}'
+# Discovery keys are fixed too; only the optional effect list is dynamic.
+_DISCOVERY_FMT = ('{{"name":"BSides Badge {}","uniq_id":"{}","cmd_t":"{}",'
+                  '"stat_t":"{}","schema":"json","brightness":true,"hs":true,'
+                  '"availability_topic":"{}","json_attr_t":"{}"{}}}')
+
+# Per-device topic suffixes under bsides_badge/<device_id>/
+_SUFFIX_SET = "light/set"
+_SUFFIX_STATE = "light/state"
+_SUFFIX_AVAIL = "availability"
+_SUFFIX_ATTR = "light/attributes"
+
+# MQTT keepalive negotiated with the broker; pinged once nothing has been
+# sent for half the interval.
+_KEEPALIVE_S = 60
+_PING_INTERVAL_MS = _KEEPALIVE_S * 1000 // 2
+
 _bridge = None
 _shared_wlan = None
 _shared_wlan_factory = None
@@ -76,6 +97,9 @@ def initialize(device_id, state_cb, command_cb, effects_cb, wifi_defaults,
                shared_wlan=None, shared_wlan_factory=None):
     """Initialise the Home Assistant integration.
 
+    ``state_cb`` returns ``(effect_index, brightness, hue, saturation,
+    effect_name, speed)`` with brightness on the 0-255 scale, or ``None``.
+
     Returns a bridge instance (which exposes ``run()``) or ``None`` when the
     configuration file does not exist or MQTT support is unavailable.
     """
@@ -97,8 +121,7 @@ def initialize(device_id, state_cb, command_cb, effects_cb, wifi_defaults,
     if not config_obj.homeassistant_enabled:
         return None
 
-    # Get the full config dict for legacy compatibility
-    config = config_obj.config
+    settings = _read_settings(config_obj)
 
     if shared_wlan_factory is not None:
         _shared_wlan_factory = shared_wlan_factory
@@ -112,11 +135,30 @@ def initialize(device_id, state_cb, command_cb, effects_cb, wifi_defaults,
         print("Home Assistant: WiFi interface unavailable")
         return None
 
-    _bridge = _HomeAssistantBridge(config, device_id, state_cb, command_cb,
+    _bridge = _HomeAssistantBridge(settings, device_id, state_cb, command_cb,
                                    effects_cb, wifi_defaults, wlan)
     return _bridge
 
 
+def _read_settings(config_obj):
+    """Pick the handful of values the bridge uses out of the badge config.
+
+    Returns ``(ssid, password, use_defaults, broker, port, username,
+    mqtt_password, discovery_prefix)`` so the bridge holds scalars instead of
+    the nested config dicts.
+    """
+
+    get = config_obj.get
+    return (get("wifi.ssid"),
+            get("wifi.password"),
+            get("wifi.use_defaults", False),
+            get("homeassistant.broker"),
+            get("homeassistant.port", 1883),
+            get("homeassistant.username"),
+            get("homeassistant.password"),
+            get("homeassistant.discovery_prefix", "homeassistant"))
+
+
 def notify_led_state():
     """Schedule a state publish when the LED parameters change."""
 
@@ -141,10 +183,14 @@ def get_sta_interface():
 
 
 class _HomeAssistantBridge:
-    def __init__(self, config, device_id, state_cb, command_cb, effects_cb,
+    def __init__(self, settings, device_id, state_cb, command_cb, effects_cb,
                  wifi_defaults, wlan):
-        self._config = config
+        (self._ssid, self._password, self._use_defaults, self._broker,
+         self._port, self._username, self._mqtt_password,
+         self._discovery_prefix) = settings
         self._device_id = device_id
+        self._dev_lower = device_id.lower()
+        self._dev_tail = device_id[-4:]
         self._state_cb = state_cb
         self._command_cb = command_cb
         self._effects_cb = effects_cb
@@ -157,32 +203,43 @@ class _HomeAssistantBridge:
         self._state_dirty = True
         self._config_dirty = True
         self._availability_sent = False
-
-        self._command_topic = self._topic("light/set")
-        self._state_topic = self._topic("light/state")
-        self._availability_topic = self._topic("availability")
+        self._wake = asyncio.Event()
+        self._last_tx = 0
+        self._reader_task = None
+        self._last_attrs = None
+        self._last_state = None
+        self._discovery_cache = None
+        self._discovery_effects_key = None
+
+        # device_id is fixed for the bridge's lifetime, so build topics once.
+        self._topic_base = "bsides_badge/{}/".format(self._dev_lower)
+        self._command_topic = self._topic(_SUFFIX_SET)
+        self._command_topic_bytes = self._command_topic.encode()
+        self._state_topic = self._topic(_SUFFIX_STATE)
+        self._availability_topic = self._topic(_SUFFIX_AVAIL)
+        self._attrs_topic = self._topic(_SUFFIX_ATTR)
 
     def _topic(self, suffix):
-        base = "bsides_badge/{}".format(self._device_id.lower())
-        return "{}/{}".format(base, suffix)
+        return self._topic_base + suffix
 
     def get_wlan(self):
         return self._wlan
 
     async def run(self):
-        """Main worker loop."""
+        """Main worker loop.
+
+        Sleeps until there is work to do: a sync request, a packet handled by
+        the reader task, or the keepalive timer. The timer runs from the last
+        packet sent, so wakeups that publish nothing do not postpone a ping.
+        """
 
         while True:
             try:
                 await self._ensure_connections()
-                if self._client:
-                    try:
-                        self._client.check_msg()
-                    except OSError:
-                        # Mark as disconnected and try again next loop.
-                        self._connected = False
-                        await asyncio.sleep(1)
-                        continue
+                if not self._connected:
+                    # Waiting for WiFi to be brought up elsewhere.
+                    await asyncio.sleep(1)
+                    continue
 
                 if self._config_dirty:
                     await self._publish_discovery()
@@ -192,17 +249,31 @@ class _HomeAssistantBridge:
                     await self._publish_state()
                     self._state_dirty = False
 
+                idle = time.ticks_diff(time.ticks_ms(), self._last_tx)
+                if idle < _PING_INTERVAL_MS:
+                    try:
+                        await asyncio.wait_for_ms(self._wake.wait(),
+                                                  _PING_INTERVAL_MS - idle)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wake.clear()
+                    idle = time.ticks_diff(time.ticks_ms(), self._last_tx)
+                if idle >= _PING_INTERVAL_MS and self._connected:
+                    self._client.ping()
+                    self._last_tx = time.ticks_ms()
+
             except Exception as exc:
                 print("Home Assistant error:", exc)
                 self._connected = False
-
-            await asyncio.sleep_ms(250)
+                await asyncio.sleep(1)
 
     def request_state_sync(self):
         self._state_dirty = True
+        self._wake.set()
 
     def request_config_sync(self):
         self._config_dirty = True
+        self._wake.set()
 
     async def _ensure_connections(self):
         if not self._wlan.active():
@@ -216,7 +287,7 @@ class _HomeAssistantBridge:
                 for _ in range(40):
                     if self._wlan.isconnected():
                         break
-                    await asyncio.sleep(0.25)
+                    await asyncio.sleep_ms(250)
             elif not self._wlan.isconnected():
                 # No credentials supplied – wait for an external connection.
                 self._connected = False
@@ -226,91 +297,143 @@ class _HomeAssistantBridge:
             raise RuntimeError("WiFi connection failed")
 
         if not self._connected:
+            self._drop_connection()
             self._connect_mqtt()
             self._connected = True
             self._state_dirty = True
             self._config_dirty = True
             self._availability_sent = False
+            self._last_attrs = None
+            self._last_state = None
 
     def _wifi_credentials(self):
-        wifi_cfg = self._config.get("wifi")
-        if not wifi_cfg:
-            return None, None
-
-        ssid = wifi_cfg.get("ssid")
-        password = wifi_cfg.get("password")
-
-        if ssid:
-            return ssid, password
+        if self._ssid:
+            return self._ssid, self._password
 
-        if self._wifi_defaults and wifi_cfg.get("use_defaults", False):
+        if self._wifi_defaults and self._use_defaults:
             return self._wifi_defaults
 
         return None, None
 
     def _connect_mqtt(self):
-        mqtt_cfg = self._config.get("homeassistant", {})
-        broker = mqtt_cfg.get("broker")
+        broker = self._broker
         if not broker:
             raise RuntimeError("MQTT broker missing in configuration")
 
-        port = mqtt_cfg.get("port", 1883)
-        client_id = "bsides_badge_{}".format(self._device_id.lower())
+        port = self._port
+        client_id = "bsides_badge_{}".format(self._dev_lower)
         self._client = MQTTClient(client_id=client_id,
                                   server=broker,
                                   port=port,
-                                  user=mqtt_cfg.get("username"),
-                                  password=mqtt_cfg.get("password"),
-                                  keepalive=60)
+                                  user=self._username,
+                                  password=self._mqtt_password,
+                                  keepalive=_KEEPALIVE_S)
         self._client.set_callback(self._on_message)
         self._client.connect()
         self._client.subscribe(self._command_topic)
+        self._last_tx = time.ticks_ms()
+        reader = asyncio.StreamReader(self._client.sock)
+        self._reader_task = asyncio.create_task(self._read_loop(reader))
         print("Home Assistant: connected to MQTT {}:{}".format(broker, port))
 
-    async def _publish_discovery(self):
-        discovery_prefix = self._config.get("homeassistant", {}).get(
-            "discovery_prefix", "homeassistant")
-        unique_id = "bsides_badge_{}".format(self._device_id.lower())
-        topic = "{}/light/{}/config".format(discovery_prefix, unique_id)
-
-        payload = {
-            "name": "BSides Badge {}".format(self._device_id[-4:]),
-            "uniq_id": unique_id,
-            "cmd_t": self._command_topic,
-            "stat_t": self._state_topic,
-            "schema": "json",
-            "brightness": True,
-            "hs": True,
-            "availability_topic": self._availability_topic,
-            "json_attr_t": self._topic("light/attributes"),
-        }
+    def _drop_connection(self):
+        """Stop the reader task and close the socket of a previous session."""
+        self._connected = False
+        if self._reader_task:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._client:
+            try:
+                self._client.sock.close()
+            except (AttributeError, OSError):
+                pass
+            self._client = None
 
-        effects = self._effects_cb() or []
-        if effects:
-            payload["effect"] = True
-            payload["effect_list"] = effects
+    async def _read_loop(self, reader):
+        """Wait on the MQTT socket and dispatch packets as they arrive."""
+        try:
+            while True:
+                res = await reader.read(1)
+                if not res:
+                    raise OSError(-1)
+                self._handle_packet(res[0])
+        except Exception as exc:
+            print("Home Assistant: receive failed:", exc)
+            self._connected = False
+            self._wake.set()
+
+    def _handle_packet(self, op):
+        """Read the rest of a packet whose first byte came from the stream.
+
+        Mirrors ``MQTTClient.wait_msg()`` without its initial socket read.
+        """
+        client = self._client
+        sock = client.sock
+        if op & 0xF0 != 0x30:
+            # PINGRESP, late SUBACK, ...: drain the body to stay framed.
+            sz = client._recv_len()
+            if sz:
+                sock.read(sz)
+            return
+
+        sz = client._recv_len()
+        topic_len = sock.read(2)
+        topic_len = (topic_len[0] << 8) | topic_len[1]
+        topic = sock.read(topic_len)
+        sz -= topic_len + 2
+        pid = 0
+        if op & 6:
+            pid = sock.read(2)
+            pid = (pid[0] << 8) | pid[1]
+            sz -= 2
+        msg = sock.read(sz)
+        self._on_message(topic, msg)
+        if op & 6 == 2:
+            sock.write(bytes((0x40, 0x02, pid >> 8, pid & 0xFF)))
 
-        self._publish(topic, json.dumps(payload))
+    async def _publish_discovery(self):
+        effects = self._effects_cb() or []
+        # Reconnects republish the same config; only re-render on new effects.
+        key = tuple(effects)
+        if self._discovery_cache is None or key != self._discovery_effects_key:
+            unique_id = "bsides_badge_{}".format(self._dev_lower)
+            topic = "{}/light/{}/config".format(self._discovery_prefix,
+                                                unique_id)
+
+            effect_part = ""
+            if effects:
+                effect_part = (',"effect":true,"effect_list":' +
+                               json.dumps(effects))
+
+            payload = _DISCOVERY_FMT.format(
+                self._dev_tail, unique_id, self._command_topic,
+                self._state_topic, self._availability_topic, self._attrs_topic,
+                effect_part)
+            self._discovery_cache = (topic, payload)
+            self._discovery_effects_key = key
+
+        self._publish(*self._discovery_cache)
 
     async def _publish_state(self):
         state = self._state_cb()
         if not state:
             return
 
-        payload = {
-            "state": "ON" if state.get("effect_index", 0) else "OFF",
-            "brightness": state.get("brightness", 0),
-            "hs_color": [state.get("hue", 0), state.get("saturation", 0)],
-            "effect": state.get("effect_name"),
-        }
-
-        self._publish(self._state_topic, json.dumps(payload))
-
-        attrs = {
-            "speed": state.get("speed", 0),
-            "effect_index": state.get("effect_index", 0),
-        }
-        self._publish(self._topic("light/attributes"), json.dumps(attrs))
+        effect_index, brightness, hue, saturation, effect_name, speed = state
+        payload = _STATE_FMT.format(
+            "ON" if effect_index else "OFF", brightness, hue, saturation,
+            # The effect name is the only free-form value; let json quote it.
+            json.dumps(effect_name))
+        if payload != self._last_state:
+            self._publish(self._state_topic, payload)
+            self._last_state = payload
+
+        # Attributes change far less often than the light state; compare the
+        # raw values so an unchanged pair costs neither formatting nor TX.
+        attrs = (speed, effect_index)
+        if attrs != self._last_attrs:
+            self._publish(self._attrs_topic, _ATTR_FMT.format(*attrs))
+            self._last_attrs = attrs
 
         if not self._availability_sent:
             self._publish(self._availability_topic, "online")
@@ -321,19 +444,18 @@ class _HomeAssistantBridge:
             return
         try:
             self._client.publish(topic, payload, retain=True)
+            self._last_tx = time.ticks_ms()
         except OSError:
             self._connected = False
             raise
 
     def _on_message(self, topic, msg):
-        if isinstance(topic, bytes):
-            topic = topic.decode()
+        # Match the raw topic first so foreign messages cost no decoding.
+        if topic != self._command_topic_bytes and topic != self._command_topic:
+            return
         if isinstance(msg, bytes):
             msg = msg.decode()
 
-        if topic != self._command_topic:
-            return
-
         try:
             data = json.loads(msg or "{}")
         except ValueError:
@@ -353,6 +475,6 @@ class _HomeAssistantBridge:
             changed = True
 
         if changed:
-            self._state_dirty = True
+            self.request_state_sync()
 
 
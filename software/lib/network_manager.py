@@ -6,6 +6,11 @@ Based on the original working implementation.
 
 import network
 import gc
+from micropython import const
+
+# Interface lifecycle; _wlan is set exactly when _state >= _STATE_INIT
+_STATE_NONE = const(0)
+_STATE_INIT = const(1)
 
 # Singleton instance
 _instance = None
@@ -15,29 +20,41 @@ class NetworkManager:
 
     def __init__(self):
         self._wlan = None
-        self._initialized = False
+        self._state = _STATE_NONE
 
     def init(self):
         """Initialize the WiFi interface."""
-        if self._initialized:
+        if self._state >= _STATE_INIT:
+            return True
+
+        # Reuse the singleton's interface instead of constructing another WLAN
+        if _instance is not None and _instance._state >= _STATE_INIT:
+            self._wlan = _instance._wlan
+            self._state = _STATE_INIT
             return True
 
         gc.collect()
 
         try:
             self._wlan = network.WLAN(network.STA_IF)
-            self._initialized = True
+            self._state = _STATE_INIT
             return True
 
-        except Exception as e:
+        except MemoryError as e:
+            # Only an allocation failure leaves garbage worth a second pass
             print("WiFi init failed:", e)
             self._wlan = None
             gc.collect()
             return False
 
+        except Exception as e:
+            print("WiFi init failed:", e)
+            self._wlan = None
+            return False
+
     def get_interface(self):
         """Get the WLAN interface, initializing if needed."""
-        if not self._initialized:
+        if self._state < _STATE_INIT:
             self.init()
         return self._wlan
 
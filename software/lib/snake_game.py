@@ -1,6 +1,118 @@
 """Snake game - lazy loaded to save memory at startup."""
 import uasyncio as asyncio
 import urandom
+import micropython
+from micropython import const
+from array import array
+
+# Cell size in pixels and tick period bounds in ms
+_CELL = const(4)
+_TICK_BASE = const(180)
+_TICK_MIN = const(70)
+
+# Slots of the int32 state vector shared with _advance_viper()
+_ST_DX = const(0)
+_ST_DY = const(1)
+_ST_HEAD = const(2)
+_ST_LEN = const(3)
+_ST_MASK = const(4)
+_ST_GRID_W = const(5)
+_ST_GRID_H = const(6)
+_ST_FOOD_X = const(7)
+_ST_FOOD_Y = const(8)
+_ST_Y0 = const(9)
+_ST_STRIDE = const(10)
+
+# _advance_viper() results
+_MOVED = const(0)
+_ATE = const(1)
+_DEAD = const(2)
+
+# Per-direction cell deltas (R, D, L, U), biased by +1 to fit in bytes
+_DX = b"\x02\x01\x00\x01"
+_DY = b"\x01\x02\x01\x00"
+
+
+@micropython.viper
+def _occ_test(occ: ptr8, cell: int) -> int:
+    """Return 1 if cell (y * GRID_W + x) is set in the occupancy bitmap."""
+    return (int(occ[cell >> 3]) >> (cell & 7)) & 1
+
+
+@micropython.viper
+def _occ_set(occ: ptr8, cell: int):
+    occ[cell >> 3] = int(occ[cell >> 3]) | (1 << (cell & 7))
+
+
+@micropython.viper
+def _advance_viper(sx: ptr8, sy: ptr8, occ: ptr8, st: ptr32) -> int:
+    """Step the snake one cell in the ring buffer sx/sy described by st.
+
+    The body occupies indices head..head+len-1 (masked), head first. Moving
+    writes the new head one slot before the old one; the tail drops off by
+    leaving len unchanged, or stays when the food is eaten. The occupancy
+    bitmap occ mirrors the body so self-collision is a single bit test.
+    """
+    mask = st[_ST_MASK]
+    head = st[_ST_HEAD]
+    length = st[_ST_LEN]
+    w = st[_ST_GRID_W]
+    nx = int(sx[head]) + st[_ST_DX]
+    ny = int(sy[head]) + st[_ST_DY]
+    if nx < 0 or nx >= w or ny < 0 or ny >= st[_ST_GRID_H]:
+        return _DEAD
+    cell = ny * w + nx
+    if (int(occ[cell >> 3]) >> (cell & 7)) & 1:
+        return _DEAD
+    head = (head - 1) & mask
+    sx[head] = nx
+    sy[head] = ny
+    st[_ST_HEAD] = head
+    occ[cell >> 3] = int(occ[cell >> 3]) | (1 << (cell & 7))
+    if nx == st[_ST_FOOD_X] and ny == st[_ST_FOOD_Y]:
+        st[_ST_LEN] = length + 1
+        return _ATE
+    tail = (head + length) & mask
+    cell = int(sy[tail]) * w + int(sx[tail])
+    occ[cell >> 3] = int(occ[cell >> 3]) & (0xFF ^ (1 << (cell & 7)))
+    return _MOVED
+
+
+@micropython.viper
+def _draw_body(buf: ptr8, sx: ptr8, sy: ptr8, st: ptr32):
+    """OR the snake into a MONO_VLSB framebuffer: head filled, rest outlined.
+
+    Each cell is written as _CELL column bytes; cells whose rows straddle
+    a page boundary spill their high bits into the next page. The playfield
+    must already be cleared.
+    """
+    mask = st[_ST_MASK]
+    head = st[_ST_HEAD]
+    n = st[_ST_LEN]
+    y0 = st[_ST_Y0]
+    stride = st[_ST_STRIDE]
+    i = 0
+    while i < n:
+        idx = (head + i) & mask
+        py = y0 + int(sy[idx]) * _CELL
+        off = (py >> 3) * stride + int(sx[idx]) * _CELL
+        edge = ((1 << _CELL) - 1) << (py & 7)
+        if i == 0:
+            mid = edge
+        else:
+            mid = (1 | (1 << (_CELL - 1))) << (py & 7)
+        c = 0
+        while c < _CELL:
+            if c == 0 or c == _CELL - 1:
+                bits = edge
+            else:
+                bits = mid
+            buf[off + c] = int(buf[off + c]) | (bits & 0xFF)
+            if bits > 0xFF:
+                buf[off + stride + c] = int(buf[off + stride + c]) | (bits >> 8)
+            c += 1
+        i += 1
+
 
 def create_snake_screen(Screen, oled, wri6, OLED_WIDTH, OLED_HEIGHT,
                         BTN_NEXT, BTN_PREV, BTN_SELECT, BTN_BACK,
@@ -20,62 +132,126 @@ def create_snake_screen(Screen, oled, wri6, OLED_WIDTH, OLED_HEIGHT,
 
         NOTE: In ui_task(), do not auto-render when current screen is SnakeScreen.
         """
-        CELL = 4
-        DIRS = [(1,0), (0,1), (-1,0), (0,-1)]  # R, D, L, U
 
         def __init__(self, oled):
             super().__init__(oled)
 
             # ----- GEOMETRY -----
             self.HUD_H = wri6.font.height()
-            self.GRID_W = OLED_WIDTH // self.CELL
-            self.GRID_H = (OLED_HEIGHT - self.HUD_H) // self.CELL
+            self.GRID_W = OLED_WIDTH // _CELL
+            self.GRID_H = (OLED_HEIGHT - self.HUD_H) // _CELL
             self.GRID_Y0 = self.HUD_H
 
             # Playfield pixel bounds
             self.x_left   = 0
             self.x_right  = self.oled.width - 1
             self.y_top    = self.GRID_Y0
-            self.y_bot    = self.GRID_Y0 + self.GRID_H * self.CELL - 1
+            self.y_bot    = self.GRID_Y0 + self.GRID_H * _CELL - 1
 
             # ----- GAME STATE -----
             self.running = True
-            self.paused = False
-            self.tick_ms_base = 180
-            self.tick_ms_min  = 70
-            self.tick_ms = self.tick_ms_base
-            self.score = 0
 
             try:
                 self.high_score = snake_high_score.value
             except:
                 self.high_score = 0
 
-            self.dir_idx = 0  # right
-            cx = self.GRID_W // 2
-            cy = self.GRID_H // 2
-            self.snake = [(cx, cy), (cx-1, cy), (cx-2, cy), (cx-3, cy)]
-            self.food = self._rand_empty_cell()
-            self.game_over = False
+            # Food probes draw x and y from one getrandbits() call; each
+            # field is rounded up to a power of two and rejected if out of range
+            wbits = 0
+            while (1 << wbits) < self.GRID_W:
+                wbits += 1
+            hbits = 0
+            while (1 << hbits) < self.GRID_H:
+                hbits += 1
+            self._wbits = wbits
+            self._rbits = wbits + hbits
+
+            # Body as a ring buffer of cell coordinates, sized to a power of
+            # two so indices wrap with a mask. Allocated once and reused by
+            # every new game.
+            cap = 1
+            while cap < self.GRID_W * self.GRID_H:
+                cap <<= 1
+            self._mask = cap - 1
+            self._sx = bytearray(cap)
+            self._sy = bytearray(cap)
+            self._st = array("i", (0, 0, 0, 4, self._mask, self.GRID_W, self.GRID_H, 0, 0,
+                                   self.GRID_Y0, self.oled.width))
+            # One bit per grid cell, set while the snake occupies it
+            self._occ = bytearray((self.GRID_W * self.GRID_H + 7) >> 3)
+            self._new_game()
+
+            # Score/high last drawn into the HUD row; -1 forces a redraw
+            self._hud_score = -1
+            self._hud_hi = -1
+
+            # Set by input so a paused or finished game sleeps until a button
+            self._wake = asyncio.Event()
 
             # Start loop last
             self._task = asyncio.create_task(self._loop())
             self.render()
 
+        def _new_game(self):
+            """Reset game state in place, reusing the preallocated buffers."""
+            self.paused = False
+            self.tick_ms = _TICK_BASE
+            self.score = 0
+            self.dir_idx = 0  # right
+
+            occ = self._occ
+            for b in range(len(occ)):
+                occ[b] = 0
+            st = self._st
+            st[_ST_HEAD] = 0
+            st[_ST_LEN] = 4
+            cx = self.GRID_W // 2
+            cy = self.GRID_H // 2
+            for i in range(4):
+                self._sx[i] = cx - i
+                self._sy[i] = cy
+                _occ_set(occ, cy * self.GRID_W + cx - i)
+            self._place_food()
+            self.game_over = False
+
         # ---------- helpers ----------
         def _cell_free(self, x, y):
-            return (x, y) not in self.snake
+            return not _occ_test(self._occ, y * self.GRID_W + x)
 
-        def _rand_empty_cell(self):
+        @micropython.native
+        def _place_food(self):
+            """Move the food to a random free cell, kept as two ints."""
+            w, h = self.GRID_W, self.GRID_H
+            wbits = self._wbits
+            wmask = (1 << wbits) - 1
+            rbits = self._rbits
             for _ in range(200):
-                x = urandom.getrandbits(5) % self.GRID_W
-                y = urandom.getrandbits(5) % self.GRID_H
-                if self._cell_free(x, y):
-                    return (x, y)
-            for yy in range(self.GRID_H):
-                for xx in range(self.GRID_W):
-                    if self._cell_free(xx, yy):
-                        return (xx, yy)
+                r = urandom.getrandbits(rbits)
+                x = r & wmask
+                y = r >> wbits
+                if x < w and y < h and self._cell_free(x, y):
+                    break
+            else:
+                x, y = self._first_free_cell()
+            self._food_x = x
+            self._food_y = y
+            st = self._st
+            st[_ST_FOOD_X] = x
+            st[_ST_FOOD_Y] = y
+
+        def _first_free_cell(self):
+            # First free cell in row-major order, skipping fully occupied bytes
+            occ = self._occ
+            cells = self.GRID_W * self.GRID_H
+            for b in range(len(occ)):
+                bits = occ[b]
+                if bits == 0xFF:
+                    continue
+                for bit in range(8):
+                    cell = (b << 3) + bit
+                    if cell < cells and not (bits >> bit) & 1:
+                        return (cell % self.GRID_W, cell // self.GRID_W)
             return (0, 0)
 
         def _turn_left(self):
@@ -84,31 +260,24 @@ def create_snake_screen(Screen, oled, wri6, OLED_WIDTH, OLED_HEIGHT,
         def _turn_right(self):
             self.dir_idx = (self.dir_idx + 1) % 4
 
+        @micropython.native
         def _advance(self):
-            dx, dy = self.DIRS[self.dir_idx]
-            hx, hy = self.snake[0]
-            nx, ny = hx + dx, hy + dy
-
-            # grid-bounds collision
-            if nx < 0 or nx >= self.GRID_W or ny < 0 or ny >= self.GRID_H:
-                self._end_game()
-                return
+            st = self._st
+            d = self.dir_idx
+            st[_ST_DX] = _DX[d] - 1
+            st[_ST_DY] = _DY[d] - 1
+            res = _advance_viper(self._sx, self._sy, self._occ, st)
 
-            # self collision
-            if (nx, ny) in self.snake:
+            # wall or self collision
+            if res == _DEAD:
                 self._end_game()
                 return
 
-            # move
-            self.snake.insert(0, (nx, ny))
-
             # eat
-            if (nx, ny) == self.food:
+            if res == _ATE:
                 self.score += 1
-                self.tick_ms = max(self.tick_ms_min, self.tick_ms_base - self.score * 6)
-                self.food = self._rand_empty_cell()
-            else:
-                self.snake.pop()
+                self.tick_ms = max(_TICK_MIN, _TICK_BASE - self.score * 6)
+                self._place_food()
 
         def _end_game(self):
             self.game_over = True
@@ -124,36 +293,39 @@ def create_snake_screen(Screen, oled, wri6, OLED_WIDTH, OLED_HEIGHT,
         async def _loop(self):
             try:
                 while self.running:
-                    if not self.paused and not self.game_over:
-                        self._advance()
-                        self.render()
+                    if self.paused or self.game_over:
+                        await self._wake.wait()
+                        self._wake.clear()
+                        continue
+                    self._advance()
+                    self.render()
                     await asyncio.sleep_ms(self.tick_ms)
             except asyncio.CancelledError:
                 return
 
         # ---------- drawing ----------
         def _draw_hud(self):
+            """Redraw the HUD row, but only when the score or high changed."""
+            if self.score == self._hud_score and self.high_score == self._hud_hi:
+                return
+            self._hud_score = self.score
+            self._hud_hi = self.high_score
             self.oled.fill_rect(0, 0, self.oled.width, self.HUD_H, 0)
             wri6.set_textpos(self.oled, 0, 0)
-            wri6.printstring("SCORE:{:d}".format(self.score))
-            hi_txt = "HI:{:d}".format(self.high_score)
+            wri6.printstring("SCORE:%d" % self.score)
+            hi_txt = "HI:%d" % self.high_score
             x_hi = self.oled.width - wri6.stringlen(hi_txt)
             wri6.set_textpos(self.oled, 0, x_hi)
             wri6.printstring(hi_txt)
             self.oled.hline(0, self.HUD_H - 1, self.oled.width, 1)
 
+        @micropython.native
         def render(self):
-            self.oled.fill(0)
+            # The HUD row is left intact between frames; clear the playfield only
+            self.oled.fill_rect(0, self.GRID_Y0, self.oled.width, self.oled.height - self.GRID_Y0, 0)
             self._draw_hud()
-            fx, fy = self.food
-            self.oled.fill_rect(fx*self.CELL, self.GRID_Y0 + fy*self.CELL, self.CELL, self.CELL, 1)
-            for i, (x, y) in enumerate(self.snake):
-                px = x * self.CELL
-                py = self.GRID_Y0 + y * self.CELL
-                if i == 0:
-                    self.oled.fill_rect(px, py, self.CELL, self.CELL, 1)
-                else:
-                    self.oled.rect(px, py, self.CELL, self.CELL, 1)
+            self.oled.fill_rect(self._food_x*_CELL, self.GRID_Y0 + self._food_y*_CELL, _CELL, _CELL, 1)
+            _draw_body(self.oled.buffer, self._sx, self._sy, self._st)
             if self.paused:
                 self._overlay_center("PAUSED")
             elif self.game_over:
@@ -177,7 +349,7 @@ def create_snake_screen(Screen, oled, wri6, OLED_WIDTH, OLED_HEIGHT,
             box_h = fh + 2 * pad
             x = (self.oled.width - box_w) // 2
             if x < 0: x = 0
-            y = self.GRID_Y0 + (self.GRID_H * self.CELL - box_h) // 2
+            y = self.GRID_Y0 + (self.GRID_H * _CELL - box_h) // 2
             if y < self.GRID_Y0: y = self.GRID_Y0
             self.oled.fill_rect(x, y, box_w, box_h, 0)
             self.oled.rect(x, y, box_w, box_h, 1)
@@ -207,7 +379,7 @@ def create_snake_screen(Screen, oled, wri6, OLED_WIDTH, OLED_HEIGHT,
             box_h = 2 * fh + gap + 2 * pad
             x = (self.oled.width - box_w) // 2
             if x < 0: x = 0
-            y = self.GRID_Y0 + (self.GRID_H * self.CELL - box_h) // 2
+            y = self.GRID_Y0 + (self.GRID_H * _CELL - box_h) // 2
             if y < self.GRID_Y0: y = self.GRID_Y0
             self.oled.fill_rect(x, y, box_w, box_h, 0)
             self.oled.rect(x, y, box_w, box_h, 1)
@@ -229,23 +401,18 @@ def create_snake_screen(Screen, oled, wri6, OLED_WIDTH, OLED_HEIGHT,
                     self._turn_left()
             if btn == BTN_SELECT:
                 if self.game_over:
-                    try:
-                        if self._task:
-                            self._task.cancel()
-                            await asyncio.sleep_ms(0)
-                    except Exception:
-                        pass
-                    self.__init__(self.oled)
-                    return self
+                    self._new_game()
                 else:
                     self.paused = not self.paused
-                    self.render()
-                    return self
+                self.render()
+                self._wake.set()
+                return self
             if btn == BTN_BACK:
                 self.running = False
                 try:
                     if self._task:
                         self._task.cancel()
+                        await self._task
                 except Exception:
                     pass
                 return UtilsScreen(self.oled)
@@ -1,6 +1,7 @@
 """Sponsors screen - lazy loaded to save memory at startup."""
 import sys
 import os
+import gc
 
 def create_sponsors_screen(Screen, oled, BTN_NEXT, BTN_PREV, BTN_BACK, UtilsScreen):
     """Factory function to create SponsorsScreen with required dependencies."""
@@ -13,32 +14,57 @@ def create_sponsors_screen(Screen, oled, BTN_NEXT, BTN_PREV, BTN_BACK, UtilsScre
             LOGO_FOLDER = "logos"
             if LOGO_FOLDER not in sys.path:
                 sys.path.append(LOGO_FOLDER)
-            logo_files = sorted([f for f in os.listdir(LOGO_FOLDER) if f.endswith(".py")])
-
-            self.logos = []
+            # Only names are kept; each logo module is imported when shown
+            self.logo_names = sorted([f[:-3] for f in os.listdir(LOGO_FOLDER) if f.endswith(".py")])
+            self._cache = {}
             self.current_logo = 0
-            for f in logo_files:
-                module_name = f[:-3]  # strip '.py'
-                mod = __import__(module_name)
-                if hasattr(mod, "fb"):
-                    self.logos.append(mod.fb)
-                else:
-                    print(f"Warning: {module_name} has no attribute 'fb'")
-
-            if not self.logos:
+            self._last_logo = -1  # logo currently on the panel
+
+            if not self.logo_names:
                 raise RuntimeError("No valid logos found!")
 
+        def _evict(self):
+            """Drop every loaded logo module so its framebuffer can be freed."""
+            for name in self._cache:
+                sys.modules.pop(name, None)
+            self._cache.clear()
+            gc.collect()
+
+        def _logo(self, name):
+            """Return the framebuffer for name, holding at most one in the heap."""
+            fb = self._cache.get(name)
+            if fb is None:
+                self._evict()
+                mod = __import__(name)
+                fb = getattr(mod, "fb", None)
+                if fb is None:
+                    print(f"Warning: {name} has no attribute 'fb'")
+                    sys.modules.pop(name, None)
+                    return None
+                self._cache[name] = fb
+            return fb
+
         def render(self):
-            self.oled.fill(0)
-            self.oled.blit(self.logos[self.current_logo], 0, 0)
+            # Skip the SPI push when the panel already shows this logo
+            if self.current_logo == self._last_logo:
+                return
+            fb = self._logo(self.logo_names[self.current_logo])
+            if fb is None:
+                self.oled.fill(0)
+            else:
+                # Logos are full-screen, so the blit overwrites every pixel
+                self.oled.blit(fb, 0, 0)
             self.oled.show()
+            self._last_logo = self.current_logo
 
         async def handle_button(self, btn):
             if btn == BTN_NEXT:
-                self.current_logo = (self.current_logo + 1) % len(self.logos)
+                self.current_logo = (self.current_logo + 1) % len(self.logo_names)
             elif btn == BTN_PREV:
-                self.current_logo = (self.current_logo - 1) % len(self.logos)
+                self.current_logo = (self.current_logo - 1) % len(self.logo_names)
+            self.render()
             if btn == BTN_BACK:
+                self._evict()
                 return UtilsScreen(self.oled)
             return self
 
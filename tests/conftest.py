@@ -1,288 +1,551 @@
+import builtins
 import importlib
+import importlib.abc
+import importlib.util
+import itertools
 import sys
 import types
+from functools import lru_cache
 from pathlib import Path
 
 import pytest
 
+# Call tags recorded by the display and writer stubs and the fakes below
+_OP_FILL = "fill"
+_OP_RECT = "rect"
+_OP_VLINE = "vline"
+_OP_FILL_RECT = "fill_rect"
+_OP_SHOW = "show"
+_OP_BLIT = "blit"
+_OP_SET_TEXTPOS = "set_textpos"
+_OP_PRINTSTRING = "printstring"
 
-def _install_stub_modules():
-    if "ubinascii" not in sys.modules:
-        import binascii
 
-        ubinascii = types.ModuleType("ubinascii")
-        ubinascii.hexlify = binascii.hexlify
-        sys.modules["ubinascii"] = ubinascii
+def _make_ubinascii():
+    import binascii
+
+    ubinascii = types.ModuleType("ubinascii")
+    ubinascii.hexlify = binascii.hexlify
+    return ubinascii
+
+
+class _URandom(types.ModuleType):
+    _MASKS = tuple((1 << bits) - 1 for bits in range(65))
+
+    def __init__(self):
+        super().__init__("urandom")
+        self._values = [0x10, 0x32, 0x54, 0x76, 0x98, 0xBA]
+        self.reset()
+
+    def getrandbits(self, bits):
+        return self._next() & self._MASKS[bits]
+
+    def reset(self):
+        self._next = itertools.cycle(self._values).__next__
+
+
+def _make_network():
+    network = types.ModuleType("network")
+
+    class DummyWLAN:
+        __slots__ = ("iface", "active_state")
+
+        instances_created = 0
+
+        def __init__(self, iface):
+            self.iface = iface
+            self.active_state = False
+            DummyWLAN.instances_created += 1
+
+        def active(self, state=None):
+            if state is None:
+                return self.active_state
+            self.active_state = state
+
+    network.WLAN = DummyWLAN
+    network.STA_IF = 0
+    return network
+
+
+def _make_socket():
+    socket = types.ModuleType("socket")
+    socket.SOCK_STREAM = 1
+    socket.AF_INET = 2
+
+    class DummySocket:
+        __slots__ = ()
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def connect(self, *args, **kwargs):
+            return None
+
+        def close(self):
+            return None
+
+    socket.socket = DummySocket
+    return socket
+
+
+def _make_ssl():
+    ssl_mod = types.ModuleType("ssl")
+
+    def wrap_socket(sock, *args, **kwargs):
+        return sock
+
+    ssl_mod.wrap_socket = wrap_socket
+    return ssl_mod
+
+
+def _make_uasyncio():
+    uasyncio = types.ModuleType("uasyncio")
+
+    class DummyTask:
+        __slots__ = ("coro", "_cancelled")
+
+        def __init__(self, coro):
+            self.coro = coro
+            self._cancelled = False
+
+        def cancel(self):
+            self._cancelled = True
+
+    class Event:
+        __slots__ = ("_flag",)
 
-    class _URandom(types.ModuleType):
         def __init__(self):
-            super().__init__("urandom")
-            self._values = [0x10, 0x32, 0x54, 0x76, 0x98, 0xBA]
-            self._idx = 0
+            self._flag = False
+
+        def set(self):
+            self._flag = True
+
+        def clear(self):
+            self._flag = False
 
-        def getrandbits(self, bits):
-            value = self._values[self._idx % len(self._values)]
-            self._idx += 1
-            return value & ((1 << bits) - 1)
+        def is_set(self):
+            return self._flag
 
-        def reset(self):
-            self._idx = 0
+        async def wait(self):
+            return True
 
-    sys.modules.setdefault("urandom", _URandom())
+    class StreamReader:
+        __slots__ = ("sock",)
 
-    if "network" not in sys.modules:
-        network = types.ModuleType("network")
+        def __init__(self, sock):
+            self.sock = sock
 
-        class DummyWLAN:
-            instances_created = 0
+        async def read(self, n):
+            return self.sock.read(n)
 
-            def __init__(self, iface):
-                self.iface = iface
-                self.active_state = False
-                DummyWLAN.instances_created += 1
+    async def sleep(_s):
+        return None
 
-            def active(self, state=None):
-                if state is None:
-                    return self.active_state
-                self.active_state = state
+    async def sleep_ms(_ms):
+        return None
 
-        network.WLAN = DummyWLAN
-        network.STA_IF = 0
-        sys.modules["network"] = network
+    async def wait_for(aw, _timeout):
+        return await aw
 
-    if "socket" not in sys.modules:
-        socket = types.ModuleType("socket")
-        socket.SOCK_STREAM = 1
-        socket.AF_INET = 2
+    async def wait_for_ms(aw, _timeout):
+        return await aw
 
-        class DummySocket:
-            def __init__(self, *args, **kwargs):
-                pass
+    def create_task(coro):
+        return DummyTask(coro)
 
-            def connect(self, *args, **kwargs):
-                return None
+    class CancelledError(Exception):
+        pass
 
-            def close(self):
-                return None
+    class TimeoutError(Exception):
+        pass
 
-        socket.socket = DummySocket
-        sys.modules["socket"] = socket
+    uasyncio.Event = Event
+    uasyncio.StreamReader = StreamReader
+    uasyncio.sleep = sleep
+    uasyncio.sleep_ms = sleep_ms
+    uasyncio.wait_for = wait_for
+    uasyncio.wait_for_ms = wait_for_ms
+    uasyncio.create_task = create_task
+    uasyncio.CancelledError = CancelledError
+    uasyncio.TimeoutError = TimeoutError
+    return uasyncio
 
-    if "ssl" not in sys.modules:
-        ssl_mod = types.ModuleType("ssl")
 
-        def wrap_socket(sock, *args, **kwargs):
-            return sock
+def _make_micropython():
+    micropython = types.ModuleType("micropython")
 
-        ssl_mod.wrap_socket = wrap_socket
-        sys.modules["ssl"] = ssl_mod
+    def schedule(func, arg):
+        func(arg)
 
-    if "uasyncio" not in sys.modules:
-        uasyncio = types.ModuleType("uasyncio")
+    def _passthrough(obj):
+        return obj
 
-        class DummyTask:
-            def __init__(self, coro):
-                self.coro = coro
-                self._cancelled = False
+    micropython.schedule = schedule
+    micropython.const = _passthrough
+    # Code emitters run the function as plain Python under CPython
+    micropython.native = _passthrough
+    micropython.viper = _passthrough
+    # Viper annotations are evaluated at def time, so the type names must exist
+    for name in ("ptr8", "ptr16", "ptr32", "uint"):
+        if not hasattr(builtins, name):
+            setattr(builtins, name, object)
+    return micropython
 
-            def cancel(self):
-                self._cancelled = True
 
-        async def sleep_ms(_ms):
+def _make_machine():
+    machine = types.ModuleType("machine")
+
+    class Pin:
+        __slots__ = ("_value",)
+
+        IN = 0
+        OUT = 1
+        IRQ_FALLING = 2
+        IRQ_RISING = 4
+
+        def __init__(self, *args, **kwargs):
+            self._value = kwargs.get("value", 1)
+
+        def irq(self, *args, **kwargs):
             return None
 
-        def create_task(coro):
-            return DummyTask(coro)
+        def value(self):
+            return self._value
+
+    class I2C:
+        __slots__ = ()
 
-        class CancelledError(Exception):
+        def __init__(self, *args, **kwargs):
             pass
 
-        uasyncio.sleep_ms = sleep_ms
-        uasyncio.create_task = create_task
-        uasyncio.CancelledError = CancelledError
-        sys.modules["uasyncio"] = uasyncio
+    machine.Pin = Pin
+    machine.I2C = I2C
+    return machine
+
 
-    if "micropython" not in sys.modules:
-        micropython = types.ModuleType("micropython")
+def _make_ssd1306():
+    ssd1306 = types.ModuleType("ssd1306")
 
-        def schedule(func, arg):
-            func(arg)
+    class SSD1306_I2C:
+        __slots__ = ("width", "height", "ops", "record")
 
-        micropython.schedule = schedule
-        sys.modules["micropython"] = micropython
+        def __init__(self, width, height, _i2c):
+            self.width = width
+            self.height = height
+            self.ops = []
+            # Set by tests that inspect ops; drawing is a no-op otherwise
+            self.record = False
 
-    if "machine" not in sys.modules:
-        machine = types.ModuleType("machine")
+        def fill(self, value):
+            if self.record:
+                self.ops.append((_OP_FILL, value))
 
-        class Pin:
-            IN = 0
-            OUT = 1
-            IRQ_FALLING = 2
-            IRQ_RISING = 4
+        def rect(self, *args):
+            if self.record:
+                self.ops.append((_OP_RECT, args))
 
-            def __init__(self, *args, **kwargs):
-                self._value = kwargs.get("value", 1)
+        def vline(self, *args):
+            if self.record:
+                self.ops.append((_OP_VLINE, args))
 
-            def irq(self, *args, **kwargs):
-                return None
+        def fill_rect(self, *args):
+            if self.record:
+                self.ops.append((_OP_FILL_RECT, args))
 
-            def value(self):
-                return self._value
+        def show(self):
+            if self.record:
+                self.ops.append((_OP_SHOW,))
 
-        class I2C:
-            def __init__(self, *args, **kwargs):
-                pass
+        def blit(self, *_args):
+            if self.record:
+                self.ops.append((_OP_BLIT, _args))
 
-        machine.Pin = Pin
-        machine.I2C = I2C
-        sys.modules["machine"] = machine
+    ssd1306.SSD1306_I2C = SSD1306_I2C
+    return ssd1306
 
-    if "ssd1306" not in sys.modules:
-        ssd1306 = types.ModuleType("ssd1306")
 
-        class SSD1306_I2C:
-            def __init__(self, width, height, _i2c):
-                self.width = width
-                self.height = height
-                self.ops = []
+def _make_neopixel():
+    neopixel = types.ModuleType("neopixel")
 
-            def fill(self, value):
-                self.ops.append(("fill", value))
+    class NeoPixel:
+        def __init__(self, pin=None, num=0, *_args, **_kwargs):
+            self.pixels = [(0, 0, 0)] * num
 
-            def rect(self, *args):
-                self.ops.append(("rect", args))
+        def fill(self, color):
+            self.pixels[:] = [color] * len(self.pixels)
 
-            def vline(self, *args):
-                self.ops.append(("vline", args))
+        def write(self):
+            return None
+
+        def __setitem__(self, index, value):
+            self.pixels[index] = value
+
+    neopixel.NeoPixel = NeoPixel
+    return neopixel
 
-            def fill_rect(self, *args):
-                self.ops.append(("fill_rect", args))
 
-            def show(self):
-                self.ops.append(("show",))
+def _make_writer_writer():
+    writer_writer = types.ModuleType("writer.writer")
 
-            def blit(self, *_args):
-                self.ops.append(("blit", _args))
+    class DummyWriter:
+        __slots__ = ("device", "font", "verbose", "calls")
 
-        ssd1306.SSD1306_I2C = SSD1306_I2C
-        sys.modules["ssd1306"] = ssd1306
+        def __init__(self, device, font, verbose=False):
+            self.device = device
+            self.font = font
+            self.verbose = verbose
+            self.calls = []
 
-    if "neopixel" not in sys.modules:
-        neopixel = types.ModuleType("neopixel")
+        def set_textpos(self, device, row, col):
+            self.calls.append((_OP_SET_TEXTPOS, row, col))
+            if hasattr(device, "set_textpos"):
+                device.set_textpos(row, col)
 
-        class NeoPixel:
-            def __init__(self, *_args, **_kwargs):
-                self.pixels = []
+        def printstring(self, text):
+            self.calls.append((_OP_PRINTSTRING, text))
 
-            def fill(self, color):
-                self.pixels = [color]
+    writer_writer.Writer = DummyWriter
+    return writer_writer
 
-            def write(self):
-                return None
 
-            def __setitem__(self, index, value):
-                if index >= len(self.pixels):
-                    self.pixels.extend([(0, 0, 0)] * (index + 1 - len(self.pixels)))
-                self.pixels[index] = value
+def _font_height():
+    return 8
 
-        neopixel.NeoPixel = NeoPixel
-        sys.modules["neopixel"] = neopixel
 
-    if "writer" not in sys.modules:
-        writer_pkg = types.ModuleType("writer")
-        writer_pkg.__path__ = []  # Mark as package
-        sys.modules["writer"] = writer_pkg
+def _font_max_width():
+    return 8
 
-        writer_writer = types.ModuleType("writer.writer")
 
-        class DummyWriter:
-            def __init__(self, device, font, verbose=False):
-                self.device = device
-                self.font = font
-                self.verbose = verbose
-                self.calls = []
+def _font_hmap():
+    return True
 
-            def set_textpos(self, device, row, col):
-                self.calls.append(("set_textpos", row, col))
-                if hasattr(device, "set_textpos"):
-                    device.set_textpos(row, col)
 
-            def printstring(self, text):
-                self.calls.append(("printstring", text))
+def _font_reverse():
+    return False
 
-        writer_writer.Writer = DummyWriter
-        sys.modules["writer.writer"] = writer_writer
 
-        def _make_font_module(name):
-            mod = types.ModuleType(name)
+def _make_font_module(name):
+    mod = types.ModuleType(name)
+    mod.height = _font_height
+    mod.max_width = _font_max_width
+    mod.hmap = _font_hmap
+    mod.reverse = _font_reverse
+    return mod
 
-            def height():
-                return 8
 
-            def max_width():
-                return 8
+def _make_writer():
+    writer_pkg = types.ModuleType("writer")
+    writer_pkg.__path__ = []  # Mark as package
+    # Submodules are registered along with the package in one update
+    submodules = {
+        "writer.writer": _make_writer_writer(),
+        "writer.freesans20": _make_font_module("writer.freesans20"),
+        "writer.font10": _make_font_module("writer.font10"),
+        "writer.font6": _make_font_module("writer.font6"),
+    }
+    for name, mod in submodules.items():
+        setattr(writer_pkg, name.rpartition(".")[2], mod)
+    sys.modules.update(submodules)
+    return writer_pkg
 
-            def hmap():
-                return True
 
-            def reverse():
-                return False
+def _make_bsides_logo():
+    bsides_logo = types.ModuleType("bsides_logo")
 
-            mod.height = height
-            mod.max_width = max_width
-            mod.hmap = hmap
-            mod.reverse = reverse
-            return mod
+    class DummyLogo:
+        __slots__ = ()
 
-        for sub in ("freesans20", "font10", "font6"):
-            mod = _make_font_module(f"writer.{sub}")
-            sys.modules[f"writer.{sub}"] = mod
+        width = 128
+        height = 64
 
-    if "bsides_logo" not in sys.modules:
-        bsides_logo = types.ModuleType("bsides_logo")
+    bsides_logo.fb = DummyLogo()
+    return bsides_logo
 
-        class DummyLogo:
-            width = 128
-            height = 64
 
-        bsides_logo.fb = DummyLogo()
-        sys.modules["bsides_logo"] = bsides_logo
+# MicroPython-only modules, built the first time something imports them
+_STUB_FACTORIES = {
+    "ubinascii": _make_ubinascii,
+    "urandom": _URandom,
+    "network": _make_network,
+    "socket": _make_socket,
+    "ssl": _make_ssl,
+    "uasyncio": _make_uasyncio,
+    "micropython": _make_micropython,
+    "machine": _make_machine,
+    "ssd1306": _make_ssd1306,
+    "neopixel": _make_neopixel,
+    "writer": _make_writer,
+    "bsides_logo": _make_bsides_logo,
+}
 
 
+class _StubFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """Serve stub modules for names in _STUB_FACTORIES on import."""
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname not in _STUB_FACTORIES:
+            return None
+        return importlib.util.spec_from_loader(
+            fullname, self, is_package=fullname == "writer")
+
+    def create_module(self, spec):
+        return _STUB_FACTORIES[spec.name]()
+
+    def exec_module(self, module):
+        pass
+
+
+def _install_stub_modules():
+    if not any(isinstance(finder, _StubFinder) for finder in sys.meta_path):
+        sys.meta_path.insert(0, _StubFinder())
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _stubs():
+    _install_stub_modules()
+
+
+@lru_cache(maxsize=None)
 def _project_root() -> Path:
     return Path(__file__).resolve().parents[1]
 
 
-@pytest.fixture(scope="module")
-def bsides25_module(tmp_path_factory):
-    tmp_path = tmp_path_factory.mktemp("badge_runtime")
-    monkeypatch = pytest.MonkeyPatch()
-    monkeypatch.chdir(tmp_path)
-    monkeypatch.setenv("BSIDES_BADGE_SKIP_MAIN", "1")
-    _install_stub_modules()
-    software_dir = _project_root() / "software"
-    monkeypatch.syspath_prepend(str(software_dir))
-    module = importlib.import_module("bsides25")
+class TimeStub:
+    """MicroPython tick functions over a clock advancing 100 ms per read."""
 
-    class _TimeStub:
-        def __init__(self):
-            self._now = 0
+    def __init__(self):
+        self._tick = itertools.count(100, 100).__next__
+
+    def ticks_ms(self):
+        return self._tick()
+
+    @staticmethod
+    def ticks_diff(a, b):
+        return a - b
+
+    @staticmethod
+    def ticks_add(a, b):
+        return a + b
+
+
+@pytest.fixture
+def time_stub():
+    return TimeStub()
 
-        def ticks_ms(self):
-            self._now += 100
-            return self._now
 
-        @staticmethod
-        def ticks_diff(a, b):
-            return a - b
+@pytest.fixture(scope="session")
+def software_path():
+    """Put software/ on sys.path so firmware modules import as on the badge."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.syspath_prepend(str(_project_root() / "software"))
+        yield
 
-        @staticmethod
-        def ticks_add(a, b):
-            return a + b
 
-    module.time = _TimeStub()
-    module.urandom.reset()
-    try:
+@pytest.fixture(scope="session")
+def bsides25_module(software_path, tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("badge_runtime")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("BSIDES_BADGE_SKIP_MAIN", "1")
+        module = sys.modules.get("bsides25") or importlib.import_module("bsides25")
+        module.time = TimeStub()
+        module.urandom.reset()
         yield module
-    finally:
-        monkeypatch.undo()
+
+
+@pytest.fixture(scope="session")
+def bsides25_initial_state(bsides25_module):
+    """Snapshot each parameter right after import as (name, param, attrs)."""
+    return tuple(
+        (name, param, {"value": param.value, "maxval": param.maxval})
+        for name, param in bsides25_module.params.items()
+    )
+
+
+class FakeOLED:
+    __slots__ = ("width", "height", "op_names", "op_args", "record")
+
+    def __init__(self, width=128, height=64):
+        self.width = width
+        self.height = height
+        self.op_names = []
+        self.op_args = []
+        self.record = False
+
+    def clear(self):
+        self.op_names.clear()
+        self.op_args.clear()
+        self.record = False
+
+    def fill(self, value):
+        if self.record:
+            self.op_names.append(_OP_FILL)
+            self.op_args.append((value,))
+
+    def rect(self, *args):
+        if self.record:
+            self.op_names.append(_OP_RECT)
+            self.op_args.append(args)
+
+    def vline(self, *args):
+        if self.record:
+            self.op_names.append(_OP_VLINE)
+            self.op_args.append(args)
+
+    def fill_rect(self, *args):
+        if self.record:
+            self.op_names.append(_OP_FILL_RECT)
+            self.op_args.append(args)
+
+    def show(self):
+        if self.record:
+            self.op_names.append(_OP_SHOW)
+            self.op_args.append(())
+
+    def set_textpos(self, row, col):
+        if self.record:
+            self.op_names.append(_OP_SET_TEXTPOS)
+            self.op_args.append((row, col))
+
+
+class DummyWriter:
+    __slots__ = ("call_names", "call_args")
+
+    def __init__(self):
+        self.call_names = []
+        self.call_args = []
+
+    def clear(self):
+        self.call_names.clear()
+        self.call_args.clear()
+
+    def set_textpos(self, device, row, col):
+        self.call_names.append(_OP_SET_TEXTPOS)
+        self.call_args.append((row, col))
+        device.set_textpos(row, col)
+
+    def printstring(self, text):
+        self.call_names.append(_OP_PRINTSTRING)
+        self.call_args.append((text,))
+
+
+@pytest.fixture(scope="module")
+def _shared_oled(bsides25_module):
+    return FakeOLED(bsides25_module.OLED_WIDTH, bsides25_module.OLED_HEIGHT)
+
+
+@pytest.fixture(scope="module")
+def _shared_writer():
+    return DummyWriter()
+
+
+@pytest.fixture
+def oled(_shared_oled):
+    yield _shared_oled
+    _shared_oled.clear()
+
+
+@pytest.fixture
+def writer(_shared_writer):
+    yield _shared_writer
+    _shared_writer.clear()
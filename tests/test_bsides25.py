@@ -4,69 +4,16 @@ from pathlib import Path
 import pytest
 
 
-class FakeOLED:
-    def __init__(self, width=128, height=64):
-        self.width = width
-        self.height = height
-        self.operations = []
-
-    def fill(self, value):
-        self.operations.append(("fill", value))
-
-    def rect(self, *args):
-        self.operations.append(("rect", args))
-
-    def vline(self, *args):
-        self.operations.append(("vline", args))
-
-    def fill_rect(self, *args):
-        self.operations.append(("fill_rect", args))
-
-    def show(self):
-        self.operations.append(("show",))
-
-    def set_textpos(self, row, col):
-        self.operations.append(("set_textpos", row, col))
-
-
-class DummyWriter:
-    def __init__(self):
-        self.calls = []
-
-    def set_textpos(self, device, row, col):
-        self.calls.append(("set_textpos", row, col))
-        device.set_textpos(row, col)
-
-    def printstring(self, text):
-        self.calls.append(("printstring", text))
-
-
 @pytest.fixture(autouse=True)
-def reset_led_state(bsides25_module, tmp_path, monkeypatch):
+def reset_led_state(bsides25_module, bsides25_initial_state, tmp_path, monkeypatch):
     module = bsides25_module
     module.led_effects[:] = [("Rainbow", object()), ("Fire", object())]
-    module.led_effect.value = 0
-    module.led_effect.maxval = 3
-    module.led_brightness.value = 10
-    module.led_brightness.maxval = 100
-    module.led_hue.value = 120
-    module.led_hue.maxval = 360
-    module.led_sat.value = 80
-    module.led_sat.maxval = 100
-    module.led_speed.value = 20
-    module.led_speed.maxval = 100
     module.homeassistant = None
     monkeypatch.chdir(tmp_path)
     module.params.clear()
-    module.params.update({
-        "Brightness": module.led_brightness,
-        "Hue": module.led_hue,
-        "Saturation": module.led_sat,
-        "Speed": module.led_speed,
-        "Light_effect": module.led_effect,
-        "SnakeHighScore": module.snake_high_score,
-    })
-    module.snake_high_score.value = 0
+    for name, param, attrs in bsides25_initial_state:
+        vars(param).update(attrs)
+        module.params[name] = param
     yield
 
 
@@ -85,14 +32,15 @@ def test_get_led_state_for_homeassistant(bsides25_module):
     module.led_sat.value = 70
     module.led_speed.value = 33
 
-    state = module.get_led_state_for_homeassistant()
+    effect_index, brightness, hue, saturation, effect_name, speed = (
+        module.get_led_state_for_homeassistant())
 
-    assert state["effect_index"] == 1
-    assert state["effect_name"] == "Fire"
-    assert state["brightness"] == module._clamp(int((50 * 255) / 100), 0, 255)
-    assert state["hue"] == 270
-    assert state["saturation"] == 70
-    assert state["speed"] == 33
+    assert effect_index == 1
+    assert effect_name == "Fire"
+    assert brightness == module._clamp(int((50 * 255) / 100), 0, 255)
+    assert hue == 270
+    assert saturation == 70
+    assert speed == 33
 
 
 def test_apply_homeassistant_command_updates(bsides25_module):
@@ -120,6 +68,7 @@ def test_apply_homeassistant_command_updates(bsides25_module):
 
 def test_apply_homeassistant_command_invalid_input(bsides25_module):
     module = bsides25_module
+    before = {name: param.value for name, param in module.params.items()}
     cmd = {
         "effect": "Unknown",
         "brightness": "not-a-number",
@@ -130,11 +79,7 @@ def test_apply_homeassistant_command_invalid_input(bsides25_module):
     changed = module.apply_homeassistant_command(cmd)
 
     assert changed is False
-    assert module.led_effect.value == 0
-    assert module.led_brightness.value == 10
-    assert module.led_hue.value == 120
-    assert module.led_sat.value == 80
-    assert module.led_speed.value == 20
+    assert {name: param.value for name, param in module.params.items()} == before
 
 
 def test_is_valid_hex_id(bsides25_module):
@@ -142,6 +87,11 @@ def test_is_valid_hex_id(bsides25_module):
     assert module.is_valid_hex_id("A1B2C3D4E5F6") is True
     assert module.is_valid_hex_id("12345") is False
     assert module.is_valid_hex_id("G1B2C3D4E5F6") is False
+    assert module.is_valid_hex_id("a1b2c3d4e5f6") is True
+    assert module.is_valid_hex_id("0x1234567890") is False
+    assert module.is_valid_hex_id(" 1234567890A") is False
+    assert module.is_valid_hex_id("+1234567890A") is False
+    assert module.is_valid_hex_id("1234567890A_") is False
 
 
 def test_load_or_create_device_id_persists(bsides25_module, tmp_path, monkeypatch):
@@ -169,16 +119,18 @@ def test_get_shared_wlan_singleton(bsides25_module):
     assert module.network.WLAN.instances_created == 1
 
 
-def test_param_screen_smoke(bsides25_module):
+def test_param_screen_smoke(bsides25_module, oled, writer):
     module = bsides25_module
-    oled = FakeOLED(module.OLED_WIDTH, module.OLED_HEIGHT)
-    writer = DummyWriter()
     param = module.Parameter("Brightness", 0, 10)
 
     screen = module.ParamScreen(oled, writer, param, lambda o: "menu", barfill=True)
+    oled.record = True
     screen.render()
 
-    assert any(call[0] == "printstring" for call in writer.calls)
+    assert oled.op_names == ["fill", "rect", "fill_rect", "set_textpos", "show"]
+    assert oled.op_args[2] == (0, 30, 0, 10, 1)
+    assert writer.call_names == ["set_textpos", "printstring"]
+    assert writer.call_args[-1] == ("Brightness:   0",)
 
     pyasyncio.run(screen.handle_button(module.BTN_NEXT))
     assert param.value == 1
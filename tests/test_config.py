@@ -0,0 +1,66 @@
+import importlib
+import json
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def config_module(software_path):
+    return importlib.import_module("lib.config")
+
+
+def test_load_sees_every_edit(config_module, tmp_path):
+    path = tmp_path / "config.json"
+    for port in (1884, 1885):
+        path.write_text(json.dumps({"homeassistant": {"port": port}}))
+        assert config_module.Config(str(path)).get("homeassistant.port") == port
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_default_file_round_trips(config_module, tmp_path):
+    path = tmp_path / "config.json"
+    config_module.Config(str(path))
+    assert path.read_text() == config_module._DEFAULT_TEXT
+
+    reloaded = config_module.Config(str(path))
+    assert reloaded.config == json.loads(config_module._DEFAULT_CONFIG_JSON)
+
+
+def test_customized_file_is_merged(config_module, tmp_path):
+    path = tmp_path / "config.json"
+    custom = json.loads(config_module._DEFAULT_CONFIG_JSON)
+    custom["wifi"]["ssid"] = "badge-net"
+    path.write_text(config_module._serialize(custom))
+
+    assert config_module.Config(str(path)).get("wifi.ssid") == "badge-net"
+
+
+def test_set_does_not_leak_into_other_instances(config_module, tmp_path):
+    first = config_module.Config(str(tmp_path / "first.json"))
+    first.set("homeassistant.broker", "10.0.0.2")
+    first.config["wifi"]["ssid"] = "mutated"
+
+    second = config_module.Config(str(tmp_path / "second.json"))
+    assert second.get("homeassistant.broker") == ""
+    assert second.get("wifi.ssid") == ""
+
+
+def test_get_reads_leaves_and_sections(config_module, tmp_path):
+    cfg = config_module.Config(str(tmp_path / "config.json"))
+
+    assert cfg.get("homeassistant.port") == 1883
+    assert cfg.get("homeassistant") is cfg.config["homeassistant"]
+    assert cfg.homeassistant_config["discovery_prefix"] == "homeassistant"
+    assert cfg.get("homeassistant.missing", "fallback") == "fallback"
+    assert cfg.get("wifi.ssid.deeper") is None
+
+
+def test_set_replaces_scalar_intermediate(config_module, tmp_path):
+    cfg = config_module.Config(str(tmp_path / "config.json"))
+    cfg.set("wifi.ssid", "plain")
+
+    cfg.set("wifi.ssid.band", "5GHz")
+
+    assert cfg.config["wifi"]["ssid"] == {"band": "5GHz"}
+    assert cfg.get("wifi.ssid.band") == "5GHz"
+    assert cfg.get("wifi.ssid") == {"band": "5GHz"}
@@ -0,0 +1,159 @@
+import asyncio as pyasyncio
+import importlib
+import io
+
+import pytest
+
+
+class FakeSocket:
+    def __init__(self, data=b""):
+        self._rx = io.BytesIO(data)
+        self.written = bytearray()
+
+    def read(self, n):
+        return self._rx.read(n)
+
+    def write(self, data):
+        self.written += data
+        return len(data)
+
+    def remaining(self):
+        return self._rx.read()
+
+
+class FakeClient:
+    """Just enough of umqtt.simple.MQTTClient for the bridge's packet path."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.published = []
+        self.pings = 0
+
+    def _recv_len(self):
+        n = 0
+        sh = 0
+        while True:
+            b = self.sock.read(1)[0]
+            n |= (b & 0x7F) << sh
+            if not b & 0x80:
+                return n
+            sh += 7
+
+    def publish(self, topic, payload, retain=False):
+        self.published.append((topic, payload))
+
+    def ping(self):
+        self.pings += 1
+
+
+def _publish_packet(topic, msg, qos=0, pid=0):
+    body = len(topic).to_bytes(2, "big") + topic
+    if qos:
+        body += pid.to_bytes(2, "big")
+    body += msg
+    assert len(body) < 128
+    return bytes((0x30 | (qos << 1), len(body))) + body
+
+
+@pytest.fixture(scope="module")
+def ha_module(software_path):
+    return importlib.import_module("lib.homeassistant")
+
+
+@pytest.fixture
+def commands():
+    return []
+
+
+@pytest.fixture
+def bridge(ha_module, commands, time_stub, monkeypatch):
+    monkeypatch.setattr(ha_module, "time", time_stub)
+    settings = ("", "", False, "broker", 1883, "", "", "homeassistant")
+    state = (1, 128, 120, 80, "Fire", 20)
+    return ha_module._HomeAssistantBridge(
+        settings, "A1B2C3D4E5F6", lambda: state,
+        lambda data: commands.append(data) or True,
+        lambda: ["Off", "Fire"], None, object())
+
+
+def _feed(bridge, data):
+    sock = FakeSocket(data)
+    bridge._client = FakeClient(sock)
+    bridge._handle_packet(sock.read(1)[0])
+    return sock
+
+
+def test_qos0_publish_dispatches_command(bridge, commands):
+    topic = bridge._command_topic_bytes
+    sock = _feed(bridge, _publish_packet(topic, b'{"effect":"Fire"}') + b"tail")
+
+    assert commands == [{"effect": "Fire"}]
+    assert sock.written == b""
+    assert sock.remaining() == b"tail"
+
+
+def test_qos1_publish_is_acknowledged(bridge, commands):
+    topic = bridge._command_topic_bytes
+    sock = _feed(bridge, _publish_packet(topic, b'{"state":"OFF"}', qos=1, pid=0x1234))
+
+    assert commands == [{"state": "OFF", "effect": "Off"}]
+    assert bytes(sock.written) == b"\x40\x02\x12\x34"
+
+
+def test_pingresp_is_drained(bridge, commands):
+    sock = _feed(bridge, b"\xd0\x00" + b"next")
+
+    assert commands == []
+    assert sock.remaining() == b"next"
+
+
+def test_on_message_ignores_foreign_topic(bridge, commands):
+    bridge._on_message(b"bsides_badge/other/light/set", b'{"state":"ON"}')
+
+    assert commands == []
+
+
+def test_run_pings_when_wakeups_publish_nothing(bridge, ha_module, monkeypatch):
+    client = FakeClient(FakeSocket())
+    bridge._client = client
+    bridge._connected = True
+    bridge._state_dirty = False
+    bridge._config_dirty = False
+    bridge._last_tx = 0
+
+    async def no_reconnect():
+        return None
+
+    wakeups = []
+
+    async def wake_without_publish(aw, _timeout_ms):
+        await aw
+        wakeups.append(_timeout_ms)
+        if len(wakeups) > ha_module._PING_INTERVAL_MS // 100:
+            raise pyasyncio.CancelledError
+        return True
+
+    monkeypatch.setattr(bridge, "_ensure_connections", no_reconnect)
+    monkeypatch.setattr(ha_module.asyncio, "wait_for_ms", wake_without_publish)
+    with pytest.raises(pyasyncio.CancelledError):
+        pyasyncio.run(bridge.run())
+
+    assert client.published == []
+    # ~60 s of wakeups go by with nothing sent: one ping per 30 s idle
+    assert client.pings == 2
+
+
+def test_publish_state_skips_only_identical_payloads(bridge):
+    client = FakeClient(FakeSocket())
+    bridge._client = client
+    states = iter([(1, 128, 120, 80, "Fire", 20),
+                   (1, 128, 120, 80, "Fire", 20),
+                   (1, 129, 120, 80, "Fire", 20)])
+    bridge._state_cb = lambda: next(states)
+
+    for _ in range(3):
+        pyasyncio.run(bridge._publish_state())
+
+    state_payloads = [p for t, p in client.published if t == bridge._state_topic]
+    assert len(state_payloads) == 2
+    assert '"brightness":129' in state_payloads[1]
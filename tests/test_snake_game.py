@@ -0,0 +1,209 @@
+import asyncio as pyasyncio
+import importlib
+import random
+
+import pytest
+
+WIDTH = 128
+HEIGHT = 64
+FONT_H = 14
+CELL = 4
+DIRS = ((1, 0), (0, 1), (-1, 0), (0, -1))  # R, D, L, U
+BTN_NEXT, BTN_PREV, BTN_SELECT, BTN_BACK = 1, 2, 3, 4
+
+
+class VLSBFrame:
+    """128x64 MONO_VLSB framebuffer with the primitives SnakeScreen uses."""
+
+    width = WIDTH
+    height = HEIGHT
+
+    def __init__(self):
+        self.buffer = bytearray(WIDTH * HEIGHT // 8)
+
+    def fill(self, c):
+        self.buffer[:] = (b"\xff" if c else b"\x00") * len(self.buffer)
+
+    def fill_rect(self, x, y, w, h, c):
+        x0, x1 = max(x, 0), min(x + w, WIDTH)
+        y0, y1 = max(y, 0), min(y + h, HEIGHT)
+        buf = self.buffer
+        for page in range(y0 >> 3, (y1 + 7) >> 3):
+            lo = max(y0, page * 8) - page * 8
+            hi = min(y1, page * 8 + 8) - page * 8
+            mask = ((1 << hi) - 1) & ~((1 << lo) - 1)
+            row = page * WIDTH
+            for i in range(row + x0, row + x1):
+                buf[i] = buf[i] | mask if c else buf[i] & ~mask & 0xFF
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c):
+        self.hline(x, y, w, c)
+        self.hline(x, y + h - 1, w, c)
+        self.vline(x, y, h, c)
+        self.vline(x + w - 1, y, h, c)
+
+    def show(self):
+        pass
+
+
+class _Font:
+    @staticmethod
+    def height():
+        return FONT_H
+
+
+class NullWriter:
+    font = _Font
+
+    def set_textpos(self, *_args):
+        pass
+
+    def printstring(self, _text):
+        pass
+
+    def stringlen(self, text):
+        return 6 * len(text)
+
+
+class _Screen:
+    def __init__(self, oled):
+        self.oled = oled
+
+
+class _HighScore:
+    value = 0
+
+
+@pytest.fixture(scope="module")
+def snake_module(software_path):
+    return importlib.import_module("lib.snake_game")
+
+
+def _new_screen(snake_module, monkeypatch, seed):
+    monkeypatch.setattr(snake_module, "urandom", random.Random(seed))
+    screen = snake_module.create_snake_screen(
+        _Screen, VLSBFrame(), NullWriter(), WIDTH, HEIGHT,
+        BTN_NEXT, BTN_PREV, BTN_SELECT, BTN_BACK,
+        _HighScore(), lambda: None, lambda oled: "utils")
+    # The game is stepped by hand; the stub task's loop never runs
+    screen._task.coro.close()
+    return screen
+
+
+def _body(screen):
+    head = screen._st[2]
+    mask = screen._mask
+    return [(screen._sx[(head + i) & mask], screen._sy[(head + i) & mask])
+            for i in range(screen._st[3])]
+
+
+def _bitmap_cells(screen):
+    w = screen.GRID_W
+    return {(c % w, c // w) for c in range(w * screen.GRID_H)
+            if (screen._occ[c >> 3] >> (c & 7)) & 1}
+
+
+def _reference_frame(screen, body):
+    """Draw the play frame with framebuf primitives, as render() used to."""
+    ref = VLSBFrame()
+    y0 = screen.GRID_Y0
+    ref.hline(0, FONT_H - 1, WIDTH, 1)
+    ref.fill_rect(screen._food_x * CELL, y0 + screen._food_y * CELL, CELL, CELL, 1)
+    for i, (x, y) in enumerate(body):
+        draw = ref.fill_rect if i == 0 else ref.rect
+        draw(x * CELL, y0 + y * CELL, CELL, CELL, 1)
+    ref.vline(screen.x_left, screen.y_top, screen.y_bot - screen.y_top + 1, 1)
+    ref.vline(screen.x_right, screen.y_top, screen.y_bot - screen.y_top + 1, 1)
+    ref.hline(0, screen.y_bot, WIDTH, 1)
+    return ref.buffer
+
+
+def _pilot(screen, body, rng):
+    """Greedy turn toward the food with random tie-breaks; may die."""
+    hx, hy = body[0]
+    occupied = set(body)
+    best = None
+    for turn in (0, 1, -1):
+        dx, dy = DIRS[(screen.dir_idx + turn) % 4]
+        nx, ny = hx + dx, hy + dy
+        if not (0 <= nx < screen.GRID_W and 0 <= ny < screen.GRID_H):
+            continue
+        if (nx, ny) in occupied:
+            continue
+        dist = abs(nx - screen._food_x) + abs(ny - screen._food_y) + rng.random()
+        if best is None or dist < best[0]:
+            best = (dist, turn)
+    if best and best[1] == 1:
+        screen._turn_right()
+    elif best and best[1] == -1:
+        screen._turn_left()
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_replay_matches_list_reference(snake_module, monkeypatch, seed):
+    screen = _new_screen(snake_module, monkeypatch, seed)
+    rng = random.Random(seed + 1000)
+    body = _body(screen)
+    assert body == [(16 - i, 6) for i in range(4)]
+
+    for _ in range(600):
+        _pilot(screen, body, rng)
+        dx, dy = DIRS[screen.dir_idx]
+        hx, hy = body[0]
+        new_head = (hx + dx, hy + dy)
+        ate = new_head == (screen._food_x, screen._food_y)
+        dead = (not (0 <= new_head[0] < screen.GRID_W and 0 <= new_head[1] < screen.GRID_H)
+                or new_head in body)
+        score = screen.score
+
+        screen._advance()
+
+        assert screen.game_over == dead
+        if dead:
+            break
+        body = [new_head] + (body if ate else body[:-1])
+        assert screen.score == score + ate
+        assert _body(screen) == body
+        assert _bitmap_cells(screen) == set(body)
+        assert (screen._food_x, screen._food_y) not in body
+
+        screen.render()
+        assert screen.oled.buffer == _reference_frame(screen, body)
+
+
+def test_draw_body_spills_across_pages(snake_module, monkeypatch):
+    screen = _new_screen(snake_module, monkeypatch, 0)
+    # GRID_Y0 is 14, so row 0 covers pixel rows 14-17: two in page 1, two in page 2
+    assert screen.GRID_Y0 % 8 == 6
+    screen._sx[0], screen._sy[0] = 3, 0
+    screen._sx[1], screen._sy[1] = 4, 0
+    screen._st[2], screen._st[3] = 0, 2
+    buf = bytearray(WIDTH * HEIGHT // 8)
+
+    snake_module._draw_body(buf, screen._sx, screen._sy, screen._st)
+
+    head = [buf[WIDTH + 12 + c] | buf[2 * WIDTH + 12 + c] << 8 for c in range(4)]
+    tail = [buf[WIDTH + 16 + c] | buf[2 * WIDTH + 16 + c] << 8 for c in range(4)]
+    assert head == [0b1111 << 6] * 4
+    assert tail == [0b1111 << 6, 0b1001 << 6, 0b1001 << 6, 0b1111 << 6]
+
+
+def test_restart_reuses_buffers(snake_module, monkeypatch):
+    screen = _new_screen(snake_module, monkeypatch, 3)
+    buffers = (screen._sx, screen._sy, screen._st, screen._occ)
+    while not screen.game_over:
+        screen._advance()
+
+    pyasyncio.run(screen.handle_button(BTN_SELECT))
+
+    assert not screen.game_over
+    assert all(a is b for a, b in zip(
+        (screen._sx, screen._sy, screen._st, screen._occ), buffers))
+    assert _body(screen) == [(16 - i, 6) for i in range(4)]
+    assert _bitmap_cells(screen) == set(_body(screen))